@@ -1,18 +1,169 @@
 import pandas as pd
+import openpyxl
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
 import re
 import os
+import mmap
 from datetime import datetime
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import queue
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv  # Only import once from correct module
 
 load_dotenv()  # Load environment variables
 
+# Sentinel jo cached body template mein doctor_name ki jagah rehta hai
+NAME_SENTINEL = '__PHOCON_DOCTOR_NAME__'
+
+# Fixed multipart boundary taaki cached image part har message mein splice ho sake
+MIME_BOUNDARY = '===============PHOCON2025MESSAGE=='
+
+# Precompiled patterns - har cell/email pe re-compile/cache-lookup avoid hota hai
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', re.ASCII)
+EMAIL_SPLIT_PATTERN = re.compile(r'[,;\s\n]+')
+
+# HTML bodies module level constants hain - har email pe multi-KB f-string
+# rebuild hone ki jagah sirf ek sentinel replace hota hai
+CONFERENCE_INVITATION_SUBJECT = "PHOCON 2025 | Meet our Esteemed International Faculty"
+CONFERENCE_INVITATION_BODY = """
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+    
+        <p style="font-size: 16px;"><strong>Dear __PHOCON_DOCTOR_NAME__</strong></p>
+    
+        <p style="font-size: 14px;">Join us at the <strong>28th Annual Pediatric Hematology Oncology Conference</strong> as <strong>Dr. Michele P Lambert</strong> shares insights on <strong>Immune Thrombocytopenia (ITP)</strong>.</p>
+    
+        <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; margin: 20px 0;">
+        <p style="margin: 0; font-size: 14px;"><strong>📅 Date:</strong> 28th – 30th November 2025</p>
+        <p style="margin: 0; font-size: 14px;"><strong>📍 Venue:</strong> Dr TMA Pai Halls, KMC, Manipal</p>
+        </div>
+    
+        <div style="text-align: center; margin: 25px 0;">
+        <a href="https://followmyevent.com/phocon-2025/" style="background-color: #007bff; color: white; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: bold;">
+        👉 Secure your spot today!
+        </a>
+        </div>
+    
+        <p style="font-size: 14px;"><strong>For Queries:</strong> +91 63646 90353</p>
+    
+        <div style="text-align: center; margin: 20px 0;">
+        <img src="cid:phocon_conference_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Conference Invitation">
+        </div>
+    
+        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
+        <p style="font-size: 14px; margin: 0;">Warm Regards,</p>
+        <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
+        </div>
+    
+        </div>
+        </body>
+        </html>
+        """
+
+MAHANAVAMI_OFFER_SUBJECT = "Special Mahanavami Offer – Exclusive Discounts on PHOCON 2025 Workshops!"
+MAHANAVAMI_OFFER_BODY = """
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+
+        <p style="font-size: 16px;"><strong>Dear __PHOCON_DOCTOR_NAME__</strong></p>
+
+        <div style="background-color: #ff6b6b; color: white; padding: 15px; text-align: center; border-radius: 8px; margin: 20px 0;">
+        <h2 style="margin: 0; font-size: 24px;">🎉 Celebrate Mahanavami!</h2>
+        <p style="margin: 5px 0 0 0; font-size: 16px;">Exclusive Discounted Rates on PHOCON 2025 Workshops</p>
+        </div>
+
+        <div style="background-color: #fff3cd; padding: 15px; border-left: 4px solid #ffc107; margin: 20px 0;">
+        <p style="margin: 0; font-size: 14px;"><strong>⏰ Offer Valid:</strong> Only on 1st & 2nd October</p>
+        <p style="margin: 5px 0 0 0; font-size: 14px; color: #856404;"><strong>Don't miss it!</strong></p>
+        </div>
+
+        <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #28a745; margin: 20px 0;">
+        <p style="margin: 0; font-size: 14px;"><strong>🎊 Limited-Time Festive Offer</strong></p>
+        <p style="margin: 5px 0 0 0; font-size: 14px;">Register soon and take advantage of exclusive workshop discounts!</p>
+        </div>
+
+        <div style="background-color: #d1ecf1; padding: 15px; border-left: 4px solid #17a2b8; margin: 20px 0;">
+        <p style="margin: 0; font-size: 14px;"><strong>🔬 Explore Wide Range of Workshops & Scientific Sessions</strong></p>
+        <p style="margin: 10px 0 0 0; font-size: 13px;">From hands-on training to cutting-edge research presentations</p>
+        </div>
+
+        <div style="text-align: center; margin: 30px 0;">
+        <a href="https://phocon2025.com/workshop-programme/" style="background-color: #17a2b8; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 16px; font-weight: bold; display: inline-block; margin: 5px;">
+        📋 VIEW WORKSHOPS
+        </a>
+        </div>
+
+        <div style="text-align: center; margin: 30px 0;">
+        <a href="https://followmyevent.com/phocon-2025/" style="background-color: #28a745; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 18px; font-weight: bold; display: inline-block;">
+        🚀 REGISTER NOW
+        </a>
+        </div>
+
+        <div style="text-align: center; margin: 20px 0;">
+        <img src="cid:phocon_abstract_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Mahanavami Offer">
+        </div>
+
+        <div style="text-align: center; background-color: #f8d7da; padding: 15px; border-radius: 8px; margin: 20px 0;">
+        <p style="margin: 0; font-size: 16px; color: #721c24;"><strong>⚠ LIMITED TIME OFFER!</strong></p>
+        <p style="margin: 5px 0 0 0; font-size: 14px; color: #721c24;">Valid only on 1st & 2nd October</p>
+        </div>
+
+        <div style="background-color: #e7f3ff; padding: 15px; border-radius: 8px; margin: 20px 0; text-align: center;">
+        <p style="margin: 0; font-size: 14px;"><strong>📞 For Queries:</strong></p>
+        <p style="margin: 5px 0 0 0; font-size: 16px; color: #004085;"><strong>+91 63646 90353</strong></p>
+        </div>
+
+        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
+        <p style="font-size: 14px; margin: 0;">Warm Regards,</p>
+        <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
+        <p style="font-size: 12px; color: #666; margin: 10px 0 0 0;">Kasturba Medical College, Manipal</p>
+        </div>
+
+        </div>
+        </body>
+        </html>
+        """
+
+FINAL_ABSTRACT_REMINDER_SUBJECT = "⏳ Final Reminder: Abstract Submission Closes 14th Sept!"
+FINAL_ABSTRACT_REMINDER_BODY = """
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        
+        <p style="font-size: 16px;"><strong>Dear __PHOCON_DOCTOR_NAME__,</strong></p>
+        
+        <div style="background-color: #dc3545; color: white; padding: 15px; text-align: center; border-radius: 8px; margin: 20px 0;">
+        <h2 style="margin: 0; font-size: 24px;">🚨 Final Reminder! 🚨</h2>
+        </div>
+        
+        <p style="font-size: 14px;">📅 Deadline: 14th Sept 2025 (Midnight)</p>
+        
+        <div style="text-align: center; margin: 30px 0;">
+        <a href="https://phocon-conference-system.vercel.app/" style="background-color: #007bff; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 18px; font-weight: bold; display: inline-block;">
+        🚀 REGISTER NOW
+        </a>
+        </div>
+        
+        <div style="text-align: center; margin: 20px 0;">
+        <img src="cid:phocon_creative_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Creative">
+        </div>
+        
+        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
+        <p style="font-size: 14px; margin: 0;">Warm regards,</p>
+        <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
+        </div>
+        
+        </div>
+        </body>
+        </html>
+        """
+
 class PHOCONFastEmailSender:
     def __init__(self, excel_file_path, conference_image_path, abstract_image_path, creative_image_path):
         self.excel_file_path = excel_file_path
@@ -21,15 +172,18 @@ class PHOCONFastEmailSender:
         self.creative_image_path = creative_image_path
         
         # Gmail SMTP Configuration from environment variables
+        # Default port 465 = implicit TLS (SMTP_SSL); port 587 = STARTTLS upgrade
+        smtp_port = int(os.getenv('SMTP_PORT', 465))
+        smtp_security = os.getenv('SMTP_SECURITY', 'starttls' if smtp_port == 587 else 'ssl')
         self.smtp_config = {
             'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            'smtp_port': int(os.getenv('SMTP_PORT', 587)),
+            'smtp_port': smtp_port,
             'sender_email': os.getenv('SENDER_EMAIL'),
             'sender_name': os.getenv('SENDER_NAME', 'PHOCON 2025 Team'),
             'username': os.getenv('SMTP_USERNAME'),
             'password': os.getenv('SMTP_PASSWORD'),
             'service': 'gmail',
-            'security': 'starttls',
+            'security': smtp_security,
             'encryption': 'TLS',
             'use_tls': True
         }
@@ -50,16 +204,33 @@ class PHOCONFastEmailSender:
             }
         }
         
-        # Thread-safe counters
-        self.successful_emails = queue.Queue()
-        self.failed_emails = queue.Queue()
-        self.skipped_emails = queue.Queue()
+        # Thread-safe counters (plain lists + ek Lock - Queue ka
+        # condition-variable overhead yahan zaroori nahi)
+        self.successful_emails = []
+        self.failed_emails = []
+        self.skipped_emails = []
+        self._results_lock = threading.Lock()
         self.selected_template = None
-        
+
+        # Per-thread SMTP connection reuse (ek connection per worker, per email nahi)
+        self._tls = threading.local()
+        self._open_connections = []
+        self._connections_lock = threading.Lock()
+
+        # Per-campaign caches - subject/body template aur image part ek hi baar bante hain
+        self._cached_subject = None
+        self._cached_body_template = None
+        self._cached_image_part = None
+        self._cached_image_part_str = None
+
         # Performance settings
         self.max_workers = 5  # Concurrent threads (Gmail limit safe)
         self.batch_size = 50  # Process in batches
         self.delay_between_emails = 0.1  # Reduced delay (0.1 seconds)
+
+        # Early-abort guard (auth lockout / rate-limit pe poora run waste na ho)
+        self.abort_min_completed = 30   # itne results ke baad hi check hota hai
+        self.abort_failure_rate = 0.33  # is rate se zyada failures = abort
         
     def display_performance_options(self):
         """Performance options display karta hai"""
@@ -137,16 +308,15 @@ class PHOCONFastEmailSender:
     
     def validate_email(self, email):
         """Email format validate karta hai"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
-    
+        return EMAIL_PATTERN.match(email) is not None
+
     def extract_emails_from_cell(self, cell_value):
         """Cell se multiple emails extract karta hai"""
         if pd.isna(cell_value) or str(cell_value).strip() == '':
             return []
-        
+
         cell_str = str(cell_value).strip()
-        emails = re.split(r'[,;\s\n]+', cell_str)
+        emails = EMAIL_SPLIT_PATTERN.split(cell_str)
         
         valid_emails = []
         for email in emails:
@@ -158,153 +328,15 @@ class PHOCONFastEmailSender:
 
     def create_conference_invitation_email(self, doctor_name):
         """Template 1: Conference invitation email content"""
-        subject = "PHOCON 2025 | Meet our Esteemed International Faculty"
-    
-        body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-    
-        <p style="font-size: 16px;"><strong>Dear {doctor_name}</strong></p>
-    
-        <p style="font-size: 14px;">Join us at the <strong>28th Annual Pediatric Hematology Oncology Conference</strong> as <strong>Dr. Michele P Lambert</strong> shares insights on <strong>Immune Thrombocytopenia (ITP)</strong>.</p>
-    
-        <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #007bff; margin: 20px 0;">
-        <p style="margin: 0; font-size: 14px;"><strong>📅 Date:</strong> 28th – 30th November 2025</p>
-        <p style="margin: 0; font-size: 14px;"><strong>📍 Venue:</strong> Dr TMA Pai Halls, KMC, Manipal</p>
-        </div>
-    
-        <div style="text-align: center; margin: 25px 0;">
-        <a href="https://followmyevent.com/phocon-2025/" style="background-color: #007bff; color: white; padding: 12px 25px; text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: bold;">
-        👉 Secure your spot today!
-        </a>
-        </div>
+        return CONFERENCE_INVITATION_SUBJECT, CONFERENCE_INVITATION_BODY.replace(NAME_SENTINEL, doctor_name)
     
-        <p style="font-size: 14px;"><strong>For Queries:</strong> +91 63646 90353</p>
-    
-        <div style="text-align: center; margin: 20px 0;">
-        <img src="cid:phocon_conference_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Conference Invitation">
-        </div>
-    
-        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
-        <p style="font-size: 14px; margin: 0;">Warm Regards,</p>
-        <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
-        </div>
-    
-        </div>
-        </body>
-        </html>
-        """
-        return subject, body
-    
-def create_mahanavami_offer_email(self, doctor_name):
-    """Template: Mahanavami special offer email content"""
-    subject = "Special Mahanavami Offer – Exclusive Discounts on PHOCON 2025 Workshops!"
-
-    body = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-
-    <p style="font-size: 16px;"><strong>Dear {doctor_name}</strong></p>
-
-    <div style="background-color: #ff6b6b; color: white; padding: 15px; text-align: center; border-radius: 8px; margin: 20px 0;">
-    <h2 style="margin: 0; font-size: 24px;">🎉 Celebrate Mahanavami!</h2>
-    <p style="margin: 5px 0 0 0; font-size: 16px;">Exclusive Discounted Rates on PHOCON 2025 Workshops</p>
-    </div>
-
-    <div style="background-color: #fff3cd; padding: 15px; border-left: 4px solid #ffc107; margin: 20px 0;">
-    <p style="margin: 0; font-size: 14px;"><strong>⏰ Offer Valid:</strong> Only on 1st & 2nd October</p>
-    <p style="margin: 5px 0 0 0; font-size: 14px; color: #856404;"><strong>Don't miss it!</strong></p>
-    </div>
-
-    <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #28a745; margin: 20px 0;">
-    <p style="margin: 0; font-size: 14px;"><strong>🎊 Limited-Time Festive Offer</strong></p>
-    <p style="margin: 5px 0 0 0; font-size: 14px;">Register soon and take advantage of exclusive workshop discounts!</p>
-    </div>
-
-    <div style="background-color: #d1ecf1; padding: 15px; border-left: 4px solid #17a2b8; margin: 20px 0;">
-    <p style="margin: 0; font-size: 14px;"><strong>🔬 Explore Wide Range of Workshops & Scientific Sessions</strong></p>
-    <p style="margin: 10px 0 0 0; font-size: 13px;">From hands-on training to cutting-edge research presentations</p>
-    </div>
-
-    <div style="text-align: center; margin: 30px 0;">
-    <a href="https://phocon2025.com/workshop-programme/" style="background-color: #17a2b8; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 16px; font-weight: bold; display: inline-block; margin: 5px;">
-    📋 VIEW WORKSHOPS
-    </a>
-    </div>
-
-    <div style="text-align: center; margin: 30px 0;">
-    <a href="https://followmyevent.com/phocon-2025/" style="background-color: #28a745; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 18px; font-weight: bold; display: inline-block;">
-    🚀 REGISTER NOW
-    </a>
-    </div>
-
-    <div style="text-align: center; margin: 20px 0;">
-    <img src="cid:phocon_abstract_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Mahanavami Offer">
-    </div>
-
-    <div style="text-align: center; background-color: #f8d7da; padding: 15px; border-radius: 8px; margin: 20px 0;">
-    <p style="margin: 0; font-size: 16px; color: #721c24;"><strong>⚠ LIMITED TIME OFFER!</strong></p>
-    <p style="margin: 5px 0 0 0; font-size: 14px; color: #721c24;">Valid only on 1st & 2nd October</p>
-    </div>
-
-    <div style="background-color: #e7f3ff; padding: 15px; border-radius: 8px; margin: 20px 0; text-align: center;">
-    <p style="margin: 0; font-size: 14px;"><strong>📞 For Queries:</strong></p>
-    <p style="margin: 5px 0 0 0; font-size: 16px; color: #004085;"><strong>+91 63646 90353</strong></p>
-    </div>
-
-    <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
-    <p style="font-size: 14px; margin: 0;">Warm Regards,</p>
-    <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
-    <p style="font-size: 12px; color: #666; margin: 10px 0 0 0;">Kasturba Medical College, Manipal</p>
-    </div>
-
-    </div>
-    </body>
-    </html>
-    """
-
-    return subject, body
+    def create_mahanavami_offer_email(self, doctor_name):
+        """Template: Mahanavami special offer email content"""
+        return MAHANAVAMI_OFFER_SUBJECT, MAHANAVAMI_OFFER_BODY.replace(NAME_SENTINEL, doctor_name)
 
     def create_final_abstract_reminder_email(self, doctor_name):
         """Template 3: Early Bird Ends Soon"""
-        subject = "⏳ Final Reminder: Abstract Submission Closes 14th Sept!"
-        
-        body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-        
-        <p style="font-size: 16px;"><strong>Dear {doctor_name},</strong></p>
-        
-        <div style="background-color: #dc3545; color: white; padding: 15px; text-align: center; border-radius: 8px; margin: 20px 0;">
-        <h2 style="margin: 0; font-size: 24px;">🚨 Final Reminder! 🚨</h2>
-        </div>
-        
-        <p style="font-size: 14px;">📅 Deadline: 14th Sept 2025 (Midnight)</p>
-        
-        <div style="text-align: center; margin: 30px 0;">
-        <a href="https://phocon-conference-system.vercel.app/" style="background-color: #007bff; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-size: 18px; font-weight: bold; display: inline-block;">
-        🚀 REGISTER NOW
-        </a>
-        </div>
-        
-        <div style="text-align: center; margin: 20px 0;">
-        <img src="cid:phocon_creative_image" style="max-width: 100%; height: auto; border-radius: 8px;" alt="PHOCON Creative">
-        </div>
-        
-        <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;">
-        <p style="font-size: 14px; margin: 0;">Warm regards,</p>
-        <p style="font-size: 14px; margin: 0;"><strong>Team PHOCON 2025</strong></p>
-        </div>
-        
-        </div>
-        </body>
-        </html>
-        """
-        
-        return subject, body
+        return FINAL_ABSTRACT_REMINDER_SUBJECT, FINAL_ABSTRACT_REMINDER_BODY.replace(NAME_SENTINEL, doctor_name)
     
     def create_email_content(self, doctor_name):
         """Selected template ke basis pe email content create karta hai"""
@@ -320,31 +352,110 @@ def create_mahanavami_offer_email(self, doctor_name):
     def create_smtp_connection(self):
         """New SMTP connection create karta hai (thread-safe)"""
         try:
-            server = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'], timeout=30)
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
+            if self.smtp_config['security'] == 'ssl':
+                # Socket shuru se hi TLS-wrapped - STARTTLS upgrade ka extra
+                # EHLO round-trip nahi lagta
+                server = smtplib.SMTP_SSL(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'], timeout=30)
+            else:
+                server = smtplib.SMTP(self.smtp_config['smtp_server'], self.smtp_config['smtp_port'], timeout=30)
+                server.ehlo()
+                server.starttls()
+                server.ehlo()
             server.login(self.smtp_config['username'], self.smtp_config['password'])
             return server
         except Exception as e:
             raise Exception(f"SMTP connection failed: {str(e)}")
-    
+
+    def get_worker_smtp_connection(self):
+        """
+        Current worker thread ka cached SMTP connection return karta hai
+        Connection dead ho (NOOP fail) toh naya banata hai - per-email
+        EHLO/STARTTLS/LOGIN handshake avoid hota hai
+        """
+        server = getattr(self._tls, 'server', None)
+
+        if server is not None:
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self.discard_worker_smtp_connection()
+
+        server = self.create_smtp_connection()
+        self._tls.server = server
+        with self._connections_lock:
+            self._open_connections.append(server)
+        return server
+
+    def initialize_worker(self):
+        """
+        ThreadPoolExecutor initializer - worker thread start hote hi SMTP
+        connection establish ho jaata hai, pehli email handshake pe wait nahi karti
+        """
+        try:
+            self.get_worker_smtp_connection()
+        except Exception as e:
+            # Send ke waqt lazily dobara try hoga
+            print(f"⚠  Worker SMTP init failed: {str(e)}")
+
+    def discard_worker_smtp_connection(self):
+        """Current worker ka dead connection close karke cache se hata deta hai"""
+        server = getattr(self._tls, 'server', None)
+        if server is None:
+            return
+        self._tls.server = None
+        with self._connections_lock:
+            if server in self._open_connections:
+                self._open_connections.remove(server)
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def close_all_smtp_connections(self):
+        """Campaign ke end pe saare cached connections QUIT karta hai"""
+        with self._connections_lock:
+            connections = list(self._open_connections)
+            self._open_connections.clear()
+
+        for server in connections:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
     def send_single_email(self, email_data):
         """Single email send karta hai (thread-safe)"""
         recipient_email, doctor_name, thread_id = email_data
-        
+
         try:
-            # Create new SMTP connection for this thread
-            server = self.create_smtp_connection()
-            
+            # Reuse this thread's SMTP connection (one handshake per worker)
+            server = self.get_worker_smtp_connection()
+
             # Create message
             msg = self.create_message(recipient_email, doctor_name)
-            
-            # Send email
-            text = msg.as_string()
-            server.sendmail(self.smtp_config['sender_email'], recipient_email, text)
-            server.quit()
-            
+
+            # Per-thread throttle - sirf isi worker ke consecutive sends pace
+            # hote hain, dispatcher/baaki workers block nahi hote
+            if self.delay_between_emails > 0:
+                last_send = getattr(self._tls, 'last_send', None)
+                if last_send is not None:
+                    elapsed = time.monotonic() - last_send
+                    if elapsed < self.delay_between_emails:
+                        time.sleep(self.delay_between_emails - elapsed)
+
+            # Send email (cached image part serialized form mein splice hota hai)
+            text = self.serialize_message(msg)
+            try:
+                server.sendmail(self.smtp_config['sender_email'], recipient_email, text)
+            except Exception:
+                # Connection stale ho sakta hai - cache se drop kar do
+                self.discard_worker_smtp_connection()
+                raise
+            finally:
+                self._tls.last_send = time.monotonic()
+
             # Thread-safe logging
             success_data = {
                 'name': doctor_name,
@@ -352,7 +463,8 @@ def create_mahanavami_offer_email(self, doctor_name):
                 'template': self.email_templates[self.selected_template]['name'],
                 'thread_id': thread_id
             }
-            self.successful_emails.put(success_data)
+            with self._results_lock:
+                self.successful_emails.append(success_data)
             
             return True, f"✅ [Thread-{thread_id}] Email sent to {doctor_name} ({recipient_email})"
             
@@ -365,59 +477,96 @@ def create_mahanavami_offer_email(self, doctor_name):
                 'template': self.email_templates[self.selected_template]['name'],
                 'thread_id': thread_id
             }
-            self.failed_emails.put(error_data)
+            with self._results_lock:
+                self.failed_emails.append(error_data)
             
             return False, f"❌ [Thread-{thread_id}] Failed to send to {doctor_name} ({recipient_email}): {str(e)}"
     
+    def prepare_campaign_cache(self):
+        """
+        Campaign shuru hone se pehle subject/body template aur image part
+        ek hi baar build karta hai - N emails ke liye N file reads aur
+        N base64 encodes ki jagah sirf ek
+        """
+        subject, body = self.create_email_content(NAME_SENTINEL)
+        self._cached_subject = subject
+        self._cached_body_template = body
+        self._cached_image_part = self.load_template_image()
+        # Image part ki MIME serialization (base64 samet) ek hi baar hoti hai
+        if self._cached_image_part is not None:
+            self._cached_image_part_str = self._cached_image_part.as_string()
+        else:
+            self._cached_image_part_str = None
+
+    def load_template_image(self):
+        """Selected template ki image ek baar read karke MIMEImage banata hai"""
+        image_config = {
+            '1': (self.conference_image_path, 'phocon_conference_image'),
+            '2': (self.abstract_image_path, 'phocon_abstract_image'),
+            '3': (self.creative_image_path, 'phocon_creative_image')
+        }
+
+        config = image_config.get(self.selected_template)
+        if not config:
+            return None
+
+        image_path, content_id = config
+        if not image_path:
+            return None
+
+        # exists() + read() ki jagah single open + mmap - bytes seedhe OS
+        # page cache se aate hain, missing file except mein handle hoti hai
+        try:
+            fd = os.open(image_path, os.O_RDONLY)
+            try:
+                mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                try:
+                    img = MIMEImage(bytes(mm))
+                finally:
+                    mm.close()
+            finally:
+                os.close(fd)
+
+            img.add_header('Content-ID', f'<{content_id}>')
+            img.add_header('Content-Disposition', 'inline',
+                         filename=os.path.basename(image_path))
+            return img
+        except Exception:
+            return None  # Continue without image if error
+
     def create_message(self, recipient_email, doctor_name):
-        """Email message create karta hai"""
+        """Email message create karta hai (cached template se, image ke bina)"""
+        if self._cached_body_template is None:
+            self.prepare_campaign_cache()
+
         msg = MIMEMultipart('related')
+        msg.set_boundary(MIME_BOUNDARY)
         msg['From'] = f"{self.smtp_config['sender_name']} <{self.smtp_config['sender_email']}>"
         msg['To'] = recipient_email
-        
-        subject, body = self.create_email_content(doctor_name)
-        msg['Subject'] = subject
-        
+        msg['Subject'] = self._cached_subject.replace(NAME_SENTINEL, doctor_name)
+
+        body = self._cached_body_template.replace(NAME_SENTINEL, doctor_name)
         msg.attach(MIMEText(body, 'html'))
-        
-        # Template ke basis pe different images attach karte hain
-        if self.selected_template == '1':
-            if os.path.exists(self.conference_image_path):
-                try:
-                    with open(self.conference_image_path, 'rb') as attachment:
-                        img = MIMEImage(attachment.read())
-                        img.add_header('Content-ID', '<phocon_conference_image>')
-                        img.add_header('Content-Disposition', 'inline', 
-                                     filename=os.path.basename(self.conference_image_path))
-                        msg.attach(img)
-                except Exception:
-                    pass  # Continue without image if error
-        
-        elif self.selected_template == '2':
-            if os.path.exists(self.abstract_image_path):
-                try:
-                    with open(self.abstract_image_path, 'rb') as attachment:
-                        img = MIMEImage(attachment.read())
-                        img.add_header('Content-ID', '<phocon_abstract_image>')
-                        img.add_header('Content-Disposition', 'inline', 
-                                     filename=os.path.basename(self.abstract_image_path))
-                        msg.attach(img)
-                except Exception:
-                    pass  # Continue without image if error
-        
-        elif self.selected_template == '3':
-            if os.path.exists(self.creative_image_path):
-                try:
-                    with open(self.creative_image_path, 'rb') as attachment:
-                        img = MIMEImage(attachment.read())
-                        img.add_header('Content-ID', '<phocon_creative_image>')
-                        img.add_header('Content-Disposition', 'inline', 
-                                     filename=os.path.basename(self.creative_image_path))
-                        msg.attach(img)
-                except Exception:
-                    pass  # Continue without image if error
-        
+
         return msg
+
+    def serialize_message(self, msg):
+        """
+        Message ko wire format mein flatten karta hai aur pre-encoded image
+        part ko closing boundary se pehle splice karta hai - 200KB image ka
+        base64 encode per-campaign ek baar hota hai, per-email nahi
+        """
+        text = msg.as_string()
+
+        if self._cached_image_part_str is None:
+            return text
+
+        closing = f'\n--{MIME_BOUNDARY}--\n'
+        head, sep, _ = text.rpartition(closing)
+        if not sep:
+            return text
+
+        return head + f'\n--{MIME_BOUNDARY}\n' + self._cached_image_part_str + closing
     
     def test_smtp_connection(self):
         """Working SMTP configuration test karta hai"""
@@ -438,112 +587,203 @@ def create_mahanavami_offer_email(self, doctor_name):
         """Excel file process karta hai aur emails send karta hai (FAST VERSION)"""
         try:
             print(f"📁 Reading Excel file: {self.excel_file_path}")
-            df = pd.read_excel(self.excel_file_path)
-            
-            df.columns = df.columns.str.lower().str.strip()
-            
-            name_col = None
-            email_col = None
-            
-            for col in df.columns:
-                if 'name' in col:
-                    name_col = col
-                if 'email' in col or 'mail' in col:
-                    email_col = col
-            
-            if name_col is None or email_col is None:
+            # read_only streaming - poora workbook memory mein load nahi hota
+            workbook = openpyxl.load_workbook(self.excel_file_path, read_only=True, data_only=True)
+            worksheet = workbook.active
+            rows = worksheet.iter_rows(values_only=True)
+
+            header = next(rows, None)
+            if header is None:
+                raise Exception("❌ Excel file is empty")
+
+            columns = [str(cell).lower().strip() if cell is not None else '' for cell in header]
+
+            name_idx = None
+            email_idx = None
+
+            # First match wins - baad waala ambiguous column ('rename',
+            # 'alternate email' waghaira) pehle se mila index steal na kare
+            for idx, col in enumerate(columns):
+                if name_idx is None and 'name' in col:
+                    name_idx = idx
+                if email_idx is None and ('email' in col or 'mail' in col):
+                    email_idx = idx
+
+            if name_idx is None or email_idx is None:
                 raise Exception("❌ Name or Email column not found in Excel file")
-            
-            print(f"✅ Found {len(df)} records")
-            print(f"📝 Name column: {name_col}")
-            print(f"📧 Email column: {email_col}")
-            
+
+            print(f"📝 Name column: {columns[name_idx]}")
+            print(f"📧 Email column: {columns[email_idx]}")
+
             template_name = self.email_templates[self.selected_template]['name']
             print(f"📧 Using Template: {template_name}")
             print(f"⚡ Performance: {self.max_workers} concurrent threads")
             print("-" * 60)
-            
-            # Prepare email list
+
+            # Template/image cache ek baar build karo, worker threads se race na ho
+            self.prepare_campaign_cache()
+
+            # Prepare email list (rows stream hoti hain, sirf do cells use hote hain)
             email_tasks = []
             thread_counter = 0
-            
-            for index, row in df.iterrows():
-                doctor_name = str(row[name_col]).strip() if pd.notna(row[name_col]) else f"Doctor_{index+1}"
-                email_cell = row[email_col]
-                
+            record_count = 0
+
+            for row in rows:
+                record_count += 1
+                name_value = row[name_idx] if name_idx < len(row) else None
+                doctor_name = str(name_value).strip() if name_value is not None else f"Doctor_{record_count}"
+                email_cell = row[email_idx] if email_idx < len(row) else None
+
                 emails = self.extract_emails_from_cell(email_cell)
-                
+
                 if not emails:
                     skip_data = {
                         'name': doctor_name,
                         'email': str(email_cell),
                         'reason': 'No valid email found'
                     }
-                    self.skipped_emails.put(skip_data)
+                    self.skipped_emails.append(skip_data)
                     continue
-                
+
                 for email in emails:
                     thread_counter += 1
                     email_tasks.append((email, doctor_name, thread_counter))
-            
+
+            workbook.close()
+            print(f"✅ Found {record_count} records")
+
+            # Duplicate recipients ko dispatch se pehle hi skip kar do
+            seen_emails = set()
+            deduped_tasks = []
+            for email, doctor_name, thread_id in email_tasks:
+                key = email.lower()
+                if key in seen_emails:
+                    self.skipped_emails.append({
+                        'name': doctor_name,
+                        'email': email,
+                        'reason': 'Duplicate email in sheet'
+                    })
+                    continue
+                seen_emails.add(key)
+                deduped_tasks.append((email, doctor_name, thread_id))
+
+            duplicate_count = len(email_tasks) - len(deduped_tasks)
+            if duplicate_count:
+                print(f"⏭  Skipped {duplicate_count} duplicate email(s)")
+            email_tasks = deduped_tasks
+
             total_emails = len(email_tasks)
             print(f"🚀 Ready to send {total_emails} emails using {self.max_workers} threads...")
             
-            # Process emails with ThreadPoolExecutor
+            # Process emails with ThreadPoolExecutor - bounded window, taaki
+            # N futures + tuples ka poora dict ek saath memory mein na bane
             completed = 0
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Submit all tasks
-                future_to_email = {executor.submit(self.send_single_email, task): task for task in email_tasks}
-                
-                # Process completed tasks
-                for future in as_completed(future_to_email):
-                    completed += 1
-                    email_data = future_to_email[future]
-                    recipient_email, doctor_name, thread_id = email_data
-                    
-                    try:
-                        success, message = future.result()
-                        print(f"[{completed}/{total_emails}] {message}")
-                        
-                        # Small delay to avoid overwhelming Gmail
-                        if self.delay_between_emails > 0:
-                            time.sleep(self.delay_between_emails)
-                            
-                    except Exception as e:
-                        print(f"[{completed}/{total_emails}] ❌ [Thread-{thread_id}] Exception: {str(e)}")
-                    
-                    # Progress update every 10 emails
-                    if completed % 10 == 0:
-                        progress = (completed/total_emails)*100
-                        print(f"📊 Progress: {progress:.1f}% ({completed}/{total_emails})")
-            
+            fail_count = 0
+            aborted = False
+            window_size = self.max_workers * 4
+            task_iter = iter(email_tasks)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    initializer=self.initialize_worker) as executor:
+                # Shuru mein sirf window-bhar tasks submit karo
+                pending = {}
+                for task in itertools.islice(task_iter, window_size):
+                    pending[executor.submit(self.send_single_email, task)] = task
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        completed += 1
+                        email_data = pending.pop(future)
+                        recipient_email, doctor_name, thread_id = email_data
+
+                        try:
+                            success, message = future.result()
+                            if not success:
+                                fail_count += 1
+                            print(f"[{completed}/{total_emails}] {message}")
+
+                        except Exception as e:
+                            fail_count += 1
+                            print(f"[{completed}/{total_emails}] ❌ [Thread-{thread_id}] Exception: {str(e)}")
+
+                        # Progress update every 10 emails
+                        if completed % 10 == 0:
+                            progress = (completed/total_emails)*100
+                            print(f"📊 Progress: {progress:.1f}% ({completed}/{total_emails})")
+
+                        # SMTP server sab refuse kar raha ho toh doomed run pe
+                        # time waste mat karo
+                        if (completed >= self.abort_min_completed
+                                and fail_count / completed > self.abort_failure_rate):
+                            print(f"🛑 Aborting campaign: {fail_count}/{completed} emails failed "
+                                  f"(> {self.abort_failure_rate:.0%} threshold)")
+                            aborted = True
+                            break
+
+                        # Window refill - ek result nikla, ek naya task andar
+                        next_task = next(task_iter, None)
+                        if next_task is not None:
+                            pending[executor.submit(self.send_single_email, next_task)] = next_task
+
+                    if aborted:
+                        for pending_future in pending:
+                            pending_future.cancel()
+                        break
+
+            if aborted:
+                # Cancelled aur kabhi submit na hue emails ko skipped mein daal do
+                # taaki report mein dikhein
+                remaining_tasks = [task for future, task in pending.items()
+                                   if future.cancelled()]
+                remaining_tasks.extend(task_iter)
+                for recipient_email, doctor_name, thread_id in remaining_tasks:
+                    self.skipped_emails.append({
+                        'name': doctor_name,
+                        'email': recipient_email,
+                        'reason': 'Campaign aborted - failure rate too high'
+                    })
+
+            # Workers ke cached SMTP connections ab QUIT kar do
+            self.close_all_smtp_connections()
+
             print(f"✅ All {total_emails} email tasks completed!")
-            
+
         except Exception as e:
+            self.close_all_smtp_connections()
             print(f"❌ Error processing Excel file: {str(e)}")
             return False
         
         return True
     
+    def write_report_file(self, records, file_path):
+        """
+        Report records ko write_only workbook se disk pe stream karta hai -
+        DataFrame + default openpyxl ka poora in-memory cell grid nahi banta
+        """
+        fields = []
+        for record in records:
+            for key in record:
+                if key not in fields:
+                    fields.append(key)
+
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(fields)
+        for record in records:
+            worksheet.append([record.get(field) for field in fields])
+        workbook.save(file_path)
+
     def generate_report(self):
         """Complete report generate karta hai (thread-safe version)"""
         print("\n" + "="*70)
         print("📊 PHOCON 2025 FAST EMAIL CAMPAIGN REPORT")
         print("="*70)
         
-        # Convert queues to lists for counting
-        successful_list = []
-        failed_list = []
-        skipped_list = []
-        
-        while not self.successful_emails.empty():
-            successful_list.append(self.successful_emails.get())
-        
-        while not self.failed_emails.empty():
-            failed_list.append(self.failed_emails.get())
-            
-        while not self.skipped_emails.empty():
-            skipped_list.append(self.skipped_emails.get())
+        successful_list = self.successful_emails
+        failed_list = self.failed_emails
+        skipped_list = self.skipped_emails
         
         total_attempts = len(successful_list) + len(failed_list)
         template_name = self.email_templates[self.selected_template]['name']
@@ -564,15 +804,13 @@ def create_mahanavami_offer_email(self, doctor_name):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if failed_list or skipped_list:
-            failed_df = pd.DataFrame(failed_list + skipped_list)
             failed_file = f"failed_emails_fast_template{self.selected_template}_{timestamp}.xlsx"
-            failed_df.to_excel(failed_file, index=False)
+            self.write_report_file(failed_list + skipped_list, failed_file)
             print(f"\n💾 Failed emails saved to: {failed_file}")
-        
+
         if successful_list:
-            success_df = pd.DataFrame(successful_list)
             success_file = f"successful_emails_fast_template{self.selected_template}_{timestamp}.xlsx"
-            success_df.to_excel(success_file, index=False)
+            self.write_report_file(successful_list, success_file)
             print(f"💾 Successful emails saved to: {success_file}")
         
         # Return both lists for use by app.py
@@ -16,12 +16,24 @@ CREATE TABLE IF NOT EXISTS campaigns (
     total_recipients INTEGER DEFAULT 0,
     emails_sent INTEGER DEFAULT 0,
     emails_failed INTEGER DEFAULT 0,
-    success_rate DECIMAL(5,2) DEFAULT 0.00,
+    success_rate DECIMAL(5,2) GENERATED ALWAYS AS (
+        CASE WHEN emails_sent + emails_failed > 0
+             THEN emails_sent::numeric * 100 / (emails_sent + emails_failed)
+             ELSE 0 END
+    ) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     completed_at TIMESTAMP,
     excel_filename VARCHAR(255)
 );
 
+-- Migration for existing databases (run once, CAREFUL!)
+-- ALTER TABLE campaigns DROP COLUMN success_rate;
+-- ALTER TABLE campaigns ADD COLUMN success_rate DECIMAL(5,2) GENERATED ALWAYS AS (
+--     CASE WHEN emails_sent + emails_failed > 0
+--          THEN emails_sent::numeric * 100 / (emails_sent + emails_failed)
+--          ELSE 0 END
+-- ) STORED;
+
 -- 2. Email Logs Table
 CREATE TABLE IF NOT EXISTS email_logs (
     id SERIAL PRIMARY KEY,